@@ -0,0 +1,88 @@
+"""Measure the overhead metrics instrumentation adds to check_limit.
+
+The reference is a limiter without metrics, which runs the plain
+``check_limit``; the other variants run the instrumented copy.
+
+Usage:
+    python -m benchmarks.bench_metrics [--users N] [--sample-rate N] [--max-overhead PCT]
+"""
+
+import argparse
+import statistics
+import sys
+import timeit
+from typing import Dict, List
+
+from src.metrics import Metrics
+from src.rate_limiter import RateLimiter
+
+
+def _time_per_call(limiter: RateLimiter, users: list, repeat: int) -> float:
+    check = limiter.check_limit
+
+    def run():
+        for user in users:
+            check(user)
+
+    run()  # warm up and create every user before timing
+    best = min(timeit.repeat(run, number=20, repeat=repeat))
+    return best / 20 / len(users)
+
+
+def main() -> int:
+    """Run the overhead benchmark.
+
+    Returns:
+        0 on success, 1 if the median overhead of counting or of 1-in-N
+        sampling exceeds ``--max-overhead``.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000, help="Distinct users per pass")
+    parser.add_argument("--sample-rate", type=int, default=100, help="Time 1 in N calls")
+    parser.add_argument("--rounds", type=int, default=30, help="Interleaved rounds")
+    parser.add_argument("--max-overhead", type=float, help="Fail above this percentage")
+    args = parser.parse_args()
+
+    users = [f"user{i}" for i in range(args.users)]
+    sampled = f"timed 1/{args.sample_rate}"
+    variants = {
+        "baseline": lambda: None,
+        "counters": lambda: Metrics(),
+        sampled: lambda: Metrics(sample_rate=args.sample_rate),
+        "timed always": lambda: Metrics(sample_rate=1),
+    }
+    best = {name: float("inf") for name in variants}
+    overheads: Dict[str, List[float]] = {name: [] for name in variants}
+
+    # Interleave variants and compare each round against its own baseline
+    # run, so machine noise that drifts between rounds cancels out.
+    for _ in range(args.rounds):
+        times = {}
+        for name, make in variants.items():
+            limiter = RateLimiter(10**9, 10**9, metrics=make())
+            times[name] = _time_per_call(limiter, users, repeat=3)
+            best[name] = min(best[name], times[name])
+        for name, seconds in times.items():
+            overheads[name].append((seconds / times["baseline"] - 1) * 100)
+
+    print(f"{'':>16}  {'best':>8}  {'overhead median':>15}  {'spread (min..max)':>19}")
+    for name in variants:
+        spread = overheads[name]
+        print(
+            f"{name:>16}: {best[name] * 1e9:6.1f}ns  {statistics.median(spread):+14.1f}%"
+            f"  {min(spread):+8.1f}%..{max(spread):+.1f}%"
+        )
+
+    if args.max_overhead is None:
+        return 0
+    status = 0
+    for name in ("counters", sampled):
+        overhead = statistics.median(overheads[name])
+        if overhead > args.max_overhead:
+            print(f"{name} overhead {overhead:.1f}% exceeds {args.max_overhead:.1f}%")
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,374 @@
+"""Benchmark suite for the gate's hot paths with regression comparison.
+
+Usage:
+    python -m benchmarks.suite run [--quick] [--users 1000,100000] [--output FILE]
+                                   [--baseline FILE] [--threshold PCT]
+    python -m benchmarks.suite compare BASELINE CURRENT [--threshold PCT]
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.traffic import (
+    blocked_patterns,
+    blocked_terms,
+    new_users,
+    prompt,
+    user_id,
+    zipf_users,
+)
+from src.budget import BudgetManager
+from src.config import Config, load_config, save_config
+from src.policy import PolicyScanner
+from src.rate_limiter import RateLimiter
+from src.tokenizer import count_tokens
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Limits high enough that every benchmarked request takes the allow path.
+UNLIMITED = 10**12
+
+
+def measure(run: Callable[[], None], ops: int, repeat: int) -> Dict[str, float]:
+    """Time a batch function.
+
+    Args:
+        run: Callable performing ``ops`` operations per call.
+        ops: Operations per call, used to normalize to ns/op.
+        repeat: Number of timed calls.
+
+    Returns:
+        Minimum and median nanoseconds per operation.
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - start) / ops * 1e9)
+    return {"min_ns": min(samples), "median_ns": statistics.median(samples)}
+
+
+def _populated_limiter(population: int) -> RateLimiter:
+    limiter = RateLimiter(requests_per_minute=UNLIMITED, requests_per_hour=UNLIMITED)
+    check = limiter.check_limit
+    # Build IDs one at a time; a list of ten million would dwarf the limiter.
+    for i in range(population):
+        check(user_id(i))
+    return limiter
+
+
+def bench_check_limit(population: int, ops: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    """Benchmark check_limit for existing and new users.
+
+    Args:
+        population: Users already tracked by the limiter.
+        ops: Requests per timed batch.
+        repeat: Number of timed batches.
+
+    Returns:
+        Results keyed by benchmark name.
+    """
+    limiter = _populated_limiter(population)
+    check = limiter.check_limit
+
+    existing = zipf_users(population, ops, seed=population)
+
+    def run_existing():
+        for user in existing:
+            check(user)
+
+    batches = iter([new_users(ops, population + i * ops) for i in range(repeat)])
+
+    def run_new():
+        for user in next(batches):
+            check(user)
+
+    return {
+        f"check_limit.existing.{population}": measure(run_existing, ops, repeat),
+        f"check_limit.new.{population}": measure(run_new, ops, repeat),
+    }
+
+
+def bench_check_budget(population: int, ops: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    """Benchmark check_budget with Zipf-distributed users.
+
+    Args:
+        population: Distinct users in the traffic.
+        ops: Requests per timed batch.
+        repeat: Number of timed batches.
+
+    Returns:
+        Results keyed by benchmark name.
+    """
+    manager = BudgetManager(token_budget=UNLIMITED)
+    check = manager.check_budget
+    traffic = zipf_users(population, ops, seed=population)
+
+    def run():
+        for user in traffic:
+            check(user, 100)
+
+    return {f"check_budget.{population}": measure(run, ops, repeat)}
+
+
+def bench_count_tokens(ops: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    """Benchmark count_tokens on short and long prompts.
+
+    Args:
+        ops: Calls per timed batch for short prompts.
+        repeat: Number of timed batches.
+
+    Returns:
+        Results keyed by benchmark name.
+    """
+    results = {}
+    for name, words, calls in (("short", 12, ops), ("long", 20000, max(1, ops // 1000))):
+        text = prompt(words)
+
+        def run(text=text, calls=calls):
+            for _ in range(calls):
+                count_tokens(text)
+
+        results[f"count_tokens.{name}"] = measure(run, calls, repeat)
+    return results
+
+
+def bench_policy(
+    ops: int, repeat: int, terms: int = 9000, patterns: int = 1000
+) -> Dict[str, Dict[str, float]]:
+    """Benchmark content policy compilation and scanning.
+
+    The default rule set is 10k patterns: 9,000 literal terms and 1,000
+    regexes, 100 of which have no literal to prefilter on.
+
+    Args:
+        ops: Scans per timed batch for short prompts.
+        repeat: Number of timed batches.
+        terms: Number of blocked literal terms.
+        patterns: Number of blocked regexes.
+
+    Returns:
+        Results keyed by benchmark name; scans also report MB/s.
+    """
+    term_list = blocked_terms(terms)
+    pattern_list = blocked_patterns(patterns)
+    rules = terms + patterns
+
+    def compile_rules():
+        PolicyScanner(term_list, pattern_list)
+
+    results = {f"policy.compile.{rules}": measure(compile_rules, 1, repeat)}
+
+    scanner = PolicyScanner(term_list, pattern_list, cache_size=0)
+    for name, words, calls in (("short", 12, ops // 10), ("long", 20000, 1)):
+        text = prompt(words)
+
+        def run(text=text, calls=calls):
+            for _ in range(calls):
+                scanner.scan(text)
+
+        result = measure(run, calls, repeat)
+        result["mb_per_s"] = len(text.encode()) / result["min_ns"] * 1e3
+        results[f"policy.scan.{name}.{rules}"] = result
+
+    cached = PolicyScanner(term_list, pattern_list)
+    text = prompt(12)
+    cached.scan(text)
+
+    def run_cached():
+        for _ in range(ops):
+            cached.scan(text)
+
+    results[f"policy.scan.cached.{rules}"] = measure(run_cached, ops, repeat)
+    return results
+
+
+def bench_load_config(ops: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    """Benchmark loading a config file from disk.
+
+    Args:
+        ops: Loads per timed batch.
+        repeat: Number of timed batches.
+
+    Returns:
+        Results keyed by benchmark name.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "config.json")
+        save_config(Config(), path)
+
+        def run():
+            for _ in range(ops):
+                load_config(path)
+
+        return {"load_config": measure(run, ops, repeat)}
+
+
+def bench_cli_startup(repeat: int) -> Dict[str, Dict[str, float]]:
+    """Benchmark a cold CLI invocation in a fresh interpreter.
+
+    Args:
+        repeat: Number of invocations.
+
+    Returns:
+        Results keyed by benchmark name.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "config.json")
+        save_config(Config(), path)
+        command = [sys.executable, "-m", "src.cli", "-c", path, "show"]
+
+        def run():
+            subprocess.run(command, cwd=REPO_ROOT, stdout=subprocess.DEVNULL, check=True)
+
+        return {"cli_startup": measure(run, 1, repeat)}
+
+
+def run_suite(populations: List[int], quick: bool = False) -> Dict[str, Dict[str, float]]:
+    """Run every benchmark.
+
+    Args:
+        populations: User population sizes for the per-user benchmarks.
+        quick: Use fewer operations, for smoke testing.
+
+    Returns:
+        Results keyed by benchmark name.
+    """
+    ops = 2000 if quick else 50000
+    repeat = 3 if quick else 7
+    results: Dict[str, Dict[str, float]] = {}
+    for population in populations:
+        print(f"check_limit / check_budget with {population} users...", file=sys.stderr)
+        results.update(bench_check_limit(population, ops, repeat))
+        results.update(bench_check_budget(population, ops, repeat))
+    results.update(bench_count_tokens(ops, repeat))
+    results.update(bench_policy(ops, repeat))
+    results.update(bench_load_config(ops // 10, repeat))
+    results.update(bench_cli_startup(repeat))
+    return results
+
+
+def compare(
+    baseline: Dict[str, Dict[str, float]],
+    current: Dict[str, Dict[str, float]],
+    threshold: float,
+) -> List[str]:
+    """Compare results against a baseline.
+
+    The table is printed to stderr so it never mixes with a JSON report
+    on stdout.
+
+    Args:
+        baseline: Baseline results keyed by benchmark name.
+        current: Current results keyed by benchmark name.
+        threshold: Allowed slowdown in percent before flagging.
+
+    Returns:
+        Names of benchmarks that regressed beyond the threshold or are
+        missing from the current results.
+    """
+    failures = []
+    print(f"{'benchmark':<36} {'baseline':>12} {'current':>12}  (ns/op)", file=sys.stderr)
+    for name in sorted(set(baseline) | set(current)):
+        if name not in baseline:
+            print(f"{name:<36} {'':>12} {current[name]['min_ns']:>12.1f}  new", file=sys.stderr)
+            continue
+        before = baseline[name]["min_ns"]
+        if name not in current:
+            print(f"{name:<36} {before:>12.1f} {'':>12}  MISSING", file=sys.stderr)
+            failures.append(name)
+            continue
+        after = current[name]["min_ns"]
+        change = (after / before - 1) * 100
+        flag = ""
+        if change > threshold:
+            flag = "REGRESSION"
+            failures.append(name)
+        print(
+            f"{name:<36} {before:>12.1f} {after:>12.1f} {change:+7.1f}%  {flag}", file=sys.stderr
+        )
+    return failures
+
+
+def _load_results(filepath: str) -> Dict[str, Dict[str, float]]:
+    with open(filepath, "r") as f:
+        return json.load(f)["results"]
+
+
+def _write_report(results: Dict[str, Dict[str, float]], filepath: Optional[str]) -> None:
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "unit": "ns/op",
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if filepath:
+        with open(filepath, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+def main() -> int:
+    """Benchmark suite entry point.
+
+    Returns:
+        0 on success, 1 if any benchmark regressed or is missing.
+    """
+    parser = argparse.ArgumentParser(description="Inference Policy Gate benchmarks")
+    subparsers = parser.add_subparsers(dest="command")
+
+    run_parser = subparsers.add_parser("run", help="Run the benchmark suite")
+    run_parser.add_argument(
+        "--users",
+        default="1000,100000",
+        help="Comma-separated user populations (e.g. 1000,100000,10000000)",
+    )
+    run_parser.add_argument("--quick", action="store_true", help="Fewer operations")
+    run_parser.add_argument("--output", "-o", help="Write JSON results to this file")
+    run_parser.add_argument("--baseline", help="Compare against this results file")
+    run_parser.add_argument("--threshold", type=float, default=10.0, help="Allowed slowdown %%")
+
+    compare_parser = subparsers.add_parser("compare", help="Compare two results files")
+    compare_parser.add_argument("baseline", help="Baseline results file")
+    compare_parser.add_argument("current", help="Current results file")
+    compare_parser.add_argument("--threshold", type=float, default=10.0, help="Allowed slowdown %%")
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        populations = [int(n) for n in args.users.split(",")]
+        results = run_suite(populations, quick=args.quick)
+        _write_report(results, args.output)
+        if not args.baseline:
+            return 0
+        baseline = _load_results(args.baseline)
+    elif args.command == "compare":
+        baseline = _load_results(args.baseline)
+        results = _load_results(args.current)
+    else:
+        parser.print_help()
+        return 1
+
+    failures = compare(baseline, results, args.threshold)
+    if failures:
+        print(
+            f"{len(failures)} benchmark(s) missing or regressed by more than {args.threshold}%",
+            file=sys.stderr,
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""Synthetic traffic generators for benchmarks."""
+
+import math
+import random
+from typing import List
+
+
+class ZipfGenerator:
+    """Draw ranks from a Zipf distribution over a fixed population.
+
+    Uses rejection-inversion sampling (Hormann and Derflinger), which needs
+    constant memory, so populations of tens of millions are cheap to model.
+    """
+
+    def __init__(self, population: int, exponent: float = 1.1, seed: int = 0):
+        """Initialize generator.
+
+        Args:
+            population: Number of distinct ranks to draw from.
+            exponent: Zipf exponent; larger values concentrate traffic on
+                fewer users.
+            seed: Seed for the random number generator.
+        """
+        if population < 1:
+            raise ValueError("population must be at least 1")
+        if exponent <= 0:
+            raise ValueError("exponent must be positive")
+        self.population = population
+        self.exponent = exponent
+        self._random = random.Random(seed)
+        self._h_integral_x1 = self._h_integral(1.5) - 1.0
+        self._h_integral_n = self._h_integral(population + 0.5)
+        self._s = 2.0 - self._h_integral_inverse(self._h_integral(2.5) - self._h(2.0))
+
+    def sample(self) -> int:
+        """Draw one rank.
+
+        Returns:
+            Rank in ``[0, population)``, where 0 is the most frequent.
+        """
+        while True:
+            u = self._h_integral_n + self._random.random() * (
+                self._h_integral_x1 - self._h_integral_n
+            )
+            x = self._h_integral_inverse(u)
+            k = min(max(int(x + 0.5), 1), self.population)
+            if k - x <= self._s or u >= self._h_integral(k + 0.5) - self._h(k):
+                return k - 1
+
+    def _h(self, x: float) -> float:
+        return math.exp(-self.exponent * math.log(x))
+
+    def _h_integral(self, x: float) -> float:
+        log_x = math.log(x)
+        return _expm1_over_x((1.0 - self.exponent) * log_x) * log_x
+
+    def _h_integral_inverse(self, x: float) -> float:
+        t = max(x * (1.0 - self.exponent), -1.0)
+        return math.exp(_log1p_over_x(t) * x)
+
+
+def _expm1_over_x(x: float) -> float:
+    if abs(x) > 1e-8:
+        return math.expm1(x) / x
+    return 1.0 + x * 0.5 * (1.0 + x / 3.0 * (1.0 + x * 0.25))
+
+
+def _log1p_over_x(x: float) -> float:
+    if abs(x) > 1e-8:
+        return math.log1p(x) / x
+    return 1.0 - x * (0.5 - x * (1.0 / 3.0 - 0.25 * x))
+
+
+def user_id(rank: int) -> str:
+    """Format a synthetic user ID.
+
+    Args:
+        rank: User rank or index.
+
+    Returns:
+        User ID string.
+    """
+    return f"user{rank}"
+
+
+def zipf_users(population: int, count: int, exponent: float = 1.1, seed: int = 0) -> List[str]:
+    """Generate user IDs for requests with Zipf-distributed popularity.
+
+    Args:
+        population: Number of distinct users.
+        count: Number of requests to generate.
+        exponent: Zipf exponent.
+        seed: Seed for the random number generator.
+
+    Returns:
+        List of user IDs, one per request.
+    """
+    generator = ZipfGenerator(population, exponent, seed)
+    return [user_id(generator.sample()) for _ in range(count)]
+
+
+def new_users(count: int, start: int) -> List[str]:
+    """Generate user IDs that have not been seen before.
+
+    Args:
+        count: Number of IDs to generate.
+        start: First index, past the existing population.
+
+    Returns:
+        List of distinct user IDs.
+    """
+    return [user_id(i) for i in range(start, start + count)]
+
+
+def prompt(words: int, seed: int = 0) -> str:
+    """Generate a synthetic prompt.
+
+    Args:
+        words: Number of words.
+        seed: Seed for the random number generator.
+
+    Returns:
+        Space-separated text with mixed word lengths and line breaks.
+    """
+    rng = random.Random(seed)
+    vocabulary = (
+        "the model should summarize following document quickly and accurately "
+        "without inventing details about it"
+    ).split()
+    parts = []
+    for i in range(words):
+        parts.append(rng.choice(vocabulary))
+        parts.append("\n" if i % 17 == 16 else " ")
+    return "".join(parts).rstrip()
+
+
+def blocked_terms(count: int, seed: int = 0) -> List[str]:
+    """Generate synthetic blocked terms that do not occur in :func:`prompt`.
+
+    Every tenth term is a two-word phrase.
+
+    Args:
+        count: Number of terms.
+        seed: Seed for the random number generator.
+
+    Returns:
+        List of distinct terms.
+    """
+    rng = random.Random(seed)
+    letters = "bcdfghjklmnpqrstvwxz"
+    terms = []
+    for i in range(count):
+        word = "".join(rng.choice(letters) for _ in range(6)) + str(i)
+        terms.append(f"the {word}" if i % 10 == 9 else word)
+    return terms
+
+
+def blocked_patterns(count: int, seed: int = 0) -> List[str]:
+    """Generate synthetic blocked regular expressions.
+
+    Most patterns contain an identifier such as "qx17" that a scanner can
+    look for before running the regex. Every tenth has no literal longer
+    than two characters, so it has to be tried at every position.
+
+    Args:
+        count: Number of patterns.
+        seed: Seed for the random number generator.
+
+    Returns:
+        List of regex sources.
+    """
+    rng = random.Random(seed)
+    letters = "bcdfghjklmnpqrstvwxz"
+    patterns = []
+    for i in range(count):
+        prefix = rng.choice(letters) + rng.choice(letters)
+        if i % 10 == 9:
+            patterns.append(rf"\b{prefix}[-_]\d{{2}}[a-z]?\d{{{i % 7 + 2}}}\b")
+        else:
+            patterns.append(rf"\b{prefix}{i}[-_]?\d{{2,6}}\b")
+    return patterns
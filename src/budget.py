@@ -1,6 +1,11 @@
 """Budget management for token usage."""
 
-from typing import Dict
+from typing import Dict, Optional
+
+from src.metrics import Metrics, BUDGET_DECISIONS, BUDGET_SECONDS, BUDGET_USERS
+
+_ALLOW = (("decision", "allow"), ("reason", "ok"))
+_DENY = (("decision", "deny"), ("reason", "budget_exceeded"))
 
 
 class BudgetExceeded(Exception):
@@ -12,14 +17,18 @@ class BudgetExceeded(Exception):
 class BudgetManager:
     """Manages token budgets per user."""
 
-    def __init__(self, token_budget: int = 100000):
+    def __init__(self, token_budget: int = 100000, metrics: Optional[Metrics] = None):
         """Initialize budget manager.
 
         Args:
             token_budget: Default token budget per user.
+            metrics: Optional metrics registry to publish decisions to.
         """
         self.token_budget = token_budget
         self._spent: Dict[str, int] = {}
+        self.metrics = metrics
+        if metrics is not None:
+            self._register_metrics(metrics)
 
     def check_budget(self, user_id: str, tokens: int) -> bool:
         """Check if request is within budget.
@@ -70,3 +79,35 @@ class BudgetManager:
         """
         if user_id in self._spent:
             del self._spent[user_id]
+
+    def _register_metrics(self, metrics: Metrics) -> None:
+        self._allowed = metrics.counter(BUDGET_DECISIONS, _ALLOW).ticks
+        self._denied = metrics.counter(BUDGET_DECISIONS, _DENY).ticks
+        self._sampler = metrics.sampler(BUDGET_SECONDS)
+        metrics.register_gauge(BUDGET_USERS, lambda: len(self._spent))
+        # Shadow check_budget on this instance only; managers without metrics
+        # keep running the plain method.
+        self.check_budget = self._check_budget_instrumented
+
+    def _check_budget_instrumented(self, user_id: str, tokens: int) -> bool:
+        """check_budget plus decision counters and sampled latency."""
+        sampler = self._sampler
+        start = None
+        if sampler is not None:
+            sampler.remaining -= 1
+            if sampler.remaining <= 0:
+                start = sampler.start()
+
+        current_spent = self._spent.get(user_id, 0)
+
+        if current_spent + tokens > self.token_budget:
+            next(self._denied)
+            allowed = False
+        else:
+            self._spent[user_id] = current_spent + tokens
+            next(self._allowed)
+            allowed = True
+
+        if start is not None:
+            sampler.stop(start)
+        return allowed
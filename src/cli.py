@@ -5,9 +5,14 @@ import json
 import sys
 
 from src.config import Config, load_config, save_config
+from src.metrics import Metrics
+from src.policy import PolicyScanner
 from src.rate_limiter import RateLimiter
 from src.budget import BudgetManager
 
+# Each invocation starts a fresh registry, so the file holds that call only.
+_METRICS_FILE_HELP = "Write this call's Prometheus metrics to FILE, replacing it"
+
 
 def cmd_init(args):
     """Initialize configuration file."""
@@ -16,6 +21,8 @@ def cmd_init(args):
         requests_per_hour=args.requests_hour,
         token_budget=args.tokens,
         config_file=args.config,
+        blocked_terms=args.block_term,
+        blocked_patterns=args.block_pattern,
     )
     save_config(config, args.config)
     print(f"Created config file: {args.config}")
@@ -33,14 +40,20 @@ def cmd_show(args):
 def cmd_check(args):
     """Check if request would be allowed."""
     config = load_config(args.config)
+    metrics = Metrics() if args.metrics_file else None
     limiter = RateLimiter(
-        requests_per_minute=config.requests_per_minute, requests_per_hour=config.requests_per_hour
+        requests_per_minute=config.requests_per_minute,
+        requests_per_hour=config.requests_per_hour,
+        metrics=metrics,
     )
-    budget = BudgetManager(token_budget=config.token_budget)
+    budget = BudgetManager(token_budget=config.token_budget, metrics=metrics)
 
     allowed = limiter.check_limit(args.user)
     budget_ok = budget.check_budget(args.user, args.tokens)
 
+    if metrics is not None:
+        metrics.write_prometheus(args.metrics_file)
+
     if allowed and budget_ok:
         print(f"Allowed - user: {args.user}, tokens: {args.tokens}")
         print(f"Remaining requests: {limiter.get_remaining(args.user)}")
@@ -55,6 +68,29 @@ def cmd_check(args):
         return 1
 
 
+def cmd_scan(args):
+    """Scan a prompt against the content policy."""
+    config = load_config(args.config)
+    metrics = Metrics() if args.metrics_file else None
+    scanner = PolicyScanner.from_config(config, metrics=metrics)
+    text = args.text if args.text is not None else sys.stdin.read()
+
+    verdict = scanner.scan(text)
+
+    if metrics is not None:
+        metrics.write_prometheus(args.metrics_file)
+
+    if verdict.allowed:
+        print(f"Allowed - tokens: {verdict.tokens}")
+        return 0
+    print(f"Blocked - tokens: {verdict.tokens}")
+    for term in verdict.matched_terms:
+        print(f"Reason: Blocked term: {term}")
+    for pattern in verdict.matched_patterns:
+        print(f"Reason: Blocked pattern: {pattern}")
+    return 1
+
+
 def cmd_status(args):
     """Show status for a user."""
     config = load_config(args.config)
@@ -104,12 +140,23 @@ def main():
     init_parser.add_argument("--requests", "-r", type=int, default=60, help="Requests per minute")
     init_parser.add_argument("--requests-hour", type=int, default=1000, help="Requests per hour")
     init_parser.add_argument("--tokens", "-t", type=int, default=100000, help="Token budget")
+    init_parser.add_argument(
+        "--block-term", action="append", default=[], help="Blocked word or phrase (repeatable)"
+    )
+    init_parser.add_argument(
+        "--block-pattern", action="append", default=[], help="Blocked regex (repeatable)"
+    )
 
     subparsers.add_parser("show", help="Show config")
 
     check_parser = subparsers.add_parser("check", help="Check if request allowed")
     check_parser.add_argument("user", help="User ID")
     check_parser.add_argument("tokens", type=int, help="Token count")
+    check_parser.add_argument("--metrics-file", metavar="FILE", help=_METRICS_FILE_HELP)
+
+    scan_parser = subparsers.add_parser("scan", help="Scan a prompt against content policy")
+    scan_parser.add_argument("text", nargs="?", help="Prompt text (default: read stdin)")
+    scan_parser.add_argument("--metrics-file", metavar="FILE", help=_METRICS_FILE_HELP)
 
     status_parser = subparsers.add_parser("status", help="Show user status")
     status_parser.add_argument("user", help="User ID")
@@ -127,6 +174,7 @@ def main():
         "init": cmd_init,
         "show": cmd_show,
         "check": cmd_check,
+        "scan": cmd_scan,
         "status": cmd_status,
         "reset": cmd_reset,
     }
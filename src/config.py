@@ -2,6 +2,7 @@
 
 import json
 import os
+from typing import List, Optional
 
 
 class Config:
@@ -13,6 +14,8 @@ class Config:
         requests_per_hour: int = 1000,
         token_budget: int = 100000,
         config_file: str = "rate_limit_config.json",
+        blocked_terms: Optional[List[str]] = None,
+        blocked_patterns: Optional[List[str]] = None,
     ):
         """Initialize config.
 
@@ -21,11 +24,15 @@ class Config:
             requests_per_hour: Max requests per hour per user.
             token_budget: Token budget per user.
             config_file: Path to config file for persistence.
+            blocked_terms: Words or phrases that block a prompt.
+            blocked_patterns: Regular expressions that block a prompt.
         """
         self.requests_per_minute = requests_per_minute
         self.requests_per_hour = requests_per_hour
         self.token_budget = token_budget
         self.config_file = config_file
+        self.blocked_terms = list(blocked_terms or [])
+        self.blocked_patterns = list(blocked_patterns or [])
 
     def to_dict(self) -> dict:
         """Convert config to dictionary.
@@ -37,6 +44,8 @@ class Config:
             "requests_per_minute": self.requests_per_minute,
             "requests_per_hour": self.requests_per_hour,
             "token_budget": self.token_budget,
+            "blocked_terms": self.blocked_terms,
+            "blocked_patterns": self.blocked_patterns,
         }
 
     @classmethod
@@ -53,6 +62,8 @@ class Config:
             requests_per_minute=data.get("requests_per_minute", 60),
             requests_per_hour=data.get("requests_per_hour", 1000),
             token_budget=data.get("token_budget", 100000),
+            blocked_terms=data.get("blocked_terms", []),
+            blocked_patterns=data.get("blocked_patterns", []),
         )
 
 
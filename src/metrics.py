@@ -0,0 +1,346 @@
+"""Low-overhead metrics with Prometheus text export."""
+
+import itertools
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+Labels = Tuple[Tuple[str, str], ...]
+_Key = Tuple[str, Labels]
+
+# Upper bounds in seconds; a check normally takes a few microseconds.
+DEFAULT_BUCKETS = (
+    0.000001,
+    0.0000025,
+    0.000005,
+    0.00001,
+    0.000025,
+    0.00005,
+    0.0001,
+    0.00025,
+    0.001,
+    0.01,
+)
+
+RATE_LIMIT_DECISIONS = "gate_rate_limit_decisions_total"
+RATE_LIMIT_SECONDS = "gate_rate_limit_check_seconds"
+RATE_LIMIT_USERS = "gate_rate_limit_tracked_users"
+BUDGET_DECISIONS = "gate_budget_decisions_total"
+BUDGET_SECONDS = "gate_budget_check_seconds"
+BUDGET_USERS = "gate_budget_tracked_users"
+TOKENIZER_CALLS = "gate_tokenizer_calls_total"
+TOKENIZER_TOKENS = "gate_tokenizer_tokens_total"
+TOKENIZER_SECONDS = "gate_tokenizer_seconds"
+POLICY_DECISIONS = "gate_policy_decisions_total"
+POLICY_CACHE_HITS = "gate_policy_cache_hits_total"
+POLICY_SECONDS = "gate_policy_scan_seconds"
+
+_HELP = {
+    RATE_LIMIT_DECISIONS: ("counter", "Rate limit decisions by outcome and reason."),
+    RATE_LIMIT_SECONDS: ("histogram", "Sampled latency of RateLimiter.check_limit."),
+    RATE_LIMIT_USERS: ("gauge", "Users currently tracked by the rate limiter."),
+    BUDGET_DECISIONS: ("counter", "Budget decisions by outcome and reason."),
+    BUDGET_SECONDS: ("histogram", "Sampled latency of BudgetManager.check_budget."),
+    BUDGET_USERS: ("gauge", "Users currently tracked by the budget manager."),
+    TOKENIZER_CALLS: ("counter", "Calls to count_tokens."),
+    TOKENIZER_TOKENS: ("counter", "Tokens counted by count_tokens."),
+    TOKENIZER_SECONDS: ("histogram", "Sampled latency of count_tokens."),
+    POLICY_DECISIONS: ("counter", "Content policy decisions by outcome and reason."),
+    POLICY_CACHE_HITS: ("counter", "Content policy verdicts served from cache."),
+    POLICY_SECONDS: ("histogram", "Sampled latency of uncached policy scans."),
+}
+
+
+class Counter:
+    """Monotonic counter that threads update without taking a lock.
+
+    Events are counted by calling ``next()`` on :attr:`ticks`, an
+    ``itertools.count``; that is one C call, atomic under the GIL, so no
+    increment is lost between threads. Hot paths keep a reference to
+    ``ticks`` and call ``next`` on it directly. Amounts other than one are
+    added under a lock, and counts a component already keeps can be
+    tracked instead of counted twice.
+    """
+
+    __slots__ = ("ticks", "_added", "_tracked", "_lock")
+
+    def __init__(self):
+        self.ticks = itertools.count()
+        self._added: float = 0
+        self._tracked: List[Callable[[], float]] = []
+        self._lock = threading.Lock()
+
+    def inc(self, value: float = 1) -> None:
+        """Increment the counter.
+
+        Args:
+            value: Amount to add.
+        """
+        if value == 1:
+            next(self.ticks)
+        else:
+            with self._lock:
+                self._added += value
+
+    def track(self, func: Callable[[], float]) -> None:
+        """Include a running count kept elsewhere in the total.
+
+        Args:
+            func: Callable returning the current count; it is evaluated on
+                every read of :attr:`value`.
+        """
+        with self._lock:
+            self._tracked.append(func)
+
+    @property
+    def value(self) -> float:
+        """Current total."""
+        # itertools.count has no accessor for its position; its repr is "count(N)".
+        ticks = int(repr(self.ticks)[6:-1])
+        return ticks + self._added + sum(func() for func in list(self._tracked))
+
+
+class Metrics:
+    """Registry of counters, gauges and fixed-bucket latency histograms.
+
+    Counters are :class:`Counter` objects, so recording a decision never
+    takes a lock; histograms are only written by sampled calls and take
+    one. Latency sampling uses one :class:`LatencySampler` per histogram.
+    """
+
+    def __init__(self, sample_rate: int = 0, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """Initialize metrics registry.
+
+        Args:
+            sample_rate: Time one in every N calls; 0 disables latency histograms.
+            buckets: Histogram bucket upper bounds in seconds.
+        """
+        if sample_rate < 0:
+            raise ValueError("sample_rate must not be negative")
+        self.sample_rate = sample_rate
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._counters: Dict[_Key, Counter] = {}
+        self._histograms: Dict[_Key, List[float]] = {}
+        self._gauges: Dict[str, List[Callable[[], float]]] = {}
+        self._samplers: Dict[str, "LatencySampler"] = {}
+
+    def counter(self, name: str, labels: Labels = ()) -> Counter:
+        """Get the counter for a series, creating it on first use.
+
+        Components that ask for the same series share one counter, so their
+        counts add up.
+
+        Args:
+            name: Metric name.
+            labels: Label pairs identifying the series.
+
+        Returns:
+            Counter for the series.
+        """
+        key = (name, labels)
+        counter = self._counters.get(key)
+        if counter is None:
+            with self._lock:
+                counter = self._counters.setdefault(key, Counter())
+        return counter
+
+    def inc(self, name: str, labels: Labels = (), value: float = 1) -> None:
+        """Increment a counter.
+
+        Args:
+            name: Metric name.
+            labels: Label pairs identifying the series.
+            value: Amount to add.
+        """
+        self.counter(name, labels).inc(value)
+
+    def sampler(self, name: str) -> Optional["LatencySampler"]:
+        """Get the sampler that times calls into a histogram.
+
+        Args:
+            name: Histogram metric name.
+
+        Returns:
+            Sampler shared by every caller of this histogram, or None if
+            sampling is off.
+        """
+        if not self.sample_rate:
+            return None
+        sampler = self._samplers.get(name)
+        if sampler is None:
+            with self._lock:
+                sampler = self._samplers.setdefault(name, LatencySampler(self, name))
+        return sampler
+
+    def observe(self, name: str, seconds: float, labels: Labels = ()) -> None:
+        """Record a latency observation.
+
+        Args:
+            name: Metric name.
+            seconds: Observed duration.
+            labels: Label pairs identifying the series.
+        """
+        key = (name, labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                # One slot per bucket, one for +Inf, then the running sum.
+                hist = self._histograms[key] = [0] * (len(self.buckets) + 2)
+            hist[bisect_left(self.buckets, seconds)] += 1
+            hist[-1] += seconds
+
+    def register_gauge(self, name: str, func: Callable[[], float]) -> None:
+        """Register a gauge evaluated at export time.
+
+        Several components may register the same gauge; their values are
+        summed.
+
+        Args:
+            name: Metric name.
+            func: Callable returning the current value.
+        """
+        with self._lock:
+            self._gauges.setdefault(name, []).append(func)
+
+    def get_counter(self, name: str, labels: Labels = ()) -> float:
+        """Get a counter value.
+
+        Args:
+            name: Metric name.
+            labels: Label pairs identifying the series.
+
+        Returns:
+            Current counter value, 0 if nothing has registered it.
+        """
+        counter = self._counters.get((name, labels))
+        return counter.value if counter is not None else 0
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in Prometheus text exposition format.
+
+        Returns:
+            Exposition text ending with a newline.
+        """
+        with self._lock:
+            counters = list(self._counters.items())
+            gauges = [(name, list(funcs)) for name, funcs in self._gauges.items()]
+            histograms = [(key, list(hist)) for key, hist in self._histograms.items()]
+        series: Dict[str, List[str]] = {}
+
+        for (name, labels), counter in sorted(counters, key=lambda item: item[0]):
+            line = f"{name}{_format_labels(labels)} {_num(counter.value)}"
+            series.setdefault(name, []).append(line)
+
+        for name, funcs in sorted(gauges):
+            value = sum(func() for func in funcs)
+            series.setdefault(name, []).append(f"{name} {_num(value)}")
+
+        for (name, labels), hist in sorted(histograms):
+            lines = series.setdefault(name, [])
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), hist[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(
+                    f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}"
+                )
+            lines.append(f"{name}_sum{_format_labels(labels)} {_num(hist[-1])}")
+            lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+
+        out = []
+        for name in sorted(series):
+            kind, help_text = _HELP.get(name, ("untyped", ""))
+            if help_text:
+                out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} {kind}")
+            out.extend(series[name])
+        return "\n".join(out) + "\n" if out else ""
+
+    def write_prometheus(self, filepath: str) -> None:
+        """Write metrics to a file for the node exporter textfile collector.
+
+        The file is replaced atomically so scrapers never see partial output.
+
+        Args:
+            filepath: Destination path.
+        """
+        directory = os.path.dirname(os.path.abspath(filepath))
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(self.render_prometheus())
+            os.replace(temp_path, filepath)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+
+class LatencySampler:
+    """Times one in every N calls of a hot method into a histogram.
+
+    The caller decrements :attr:`remaining` inline and calls :meth:`start`
+    once it reaches zero, so unsampled calls never enter a Python frame::
+
+        start = None
+        if sampler is not None:
+            sampler.remaining -= 1
+            if sampler.remaining <= 0:
+                start = sampler.start()
+        ...
+        if start is not None:
+            sampler.stop(start)
+
+    The countdown is not locked; a race only changes which call is timed.
+    """
+
+    __slots__ = ("metrics", "name", "remaining")
+
+    def __init__(self, metrics: Metrics, name: str):
+        """Initialize sampler.
+
+        Args:
+            metrics: Registry to record observations into; its
+                ``sample_rate`` must be positive.
+            name: Histogram metric name.
+        """
+        self.metrics = metrics
+        self.name = name
+        self.remaining = metrics.sample_rate
+
+    def start(self) -> float:
+        """Restart the countdown and begin timing a sampled call.
+
+        Returns:
+            Start timestamp to pass to :meth:`stop`.
+        """
+        self.remaining = self.metrics.sample_rate
+        return time.perf_counter()
+
+    def stop(self, start: float) -> None:
+        """Record the duration of a sampled call.
+
+        Args:
+            start: Timestamp returned by :meth:`start`.
+        """
+        self.metrics.observe(self.name, time.perf_counter() - start)
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels:
+        escaped = value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{key}="{escaped}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _num(value: float) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
@@ -0,0 +1,587 @@
+"""Content policy scanning for prompts."""
+
+import hashlib
+import re
+from collections import OrderedDict, deque
+from typing import Dict, List, NamedTuple, Optional, Pattern, Sequence, Tuple, Union
+
+try:
+    from re import _parser as _sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse as _sre_parse
+
+from src.config import Config
+from src.metrics import (
+    LatencySampler,
+    Metrics,
+    POLICY_CACHE_HITS,
+    POLICY_DECISIONS,
+    POLICY_SECONDS,
+)
+
+# Terms and prompts are split into words, dropping punctuation; terms that
+# contain punctuation are matched on tokens that keep each symbol instead.
+_WORD = re.compile(r"[^\W_]+")
+_TOKEN = re.compile(r"[^\W_]+|[^\w\s]|_")
+_QUOTES = str.maketrans("‘’“”", "''\"\"")
+
+_ALLOW = (("decision", "allow"), ("reason", "ok"))
+_DENY = (("decision", "deny"), ("reason", "content_policy"))
+
+# Prompts up to this length are cached under their own text, which is
+# exact and cheaper than hashlib; longer ones under a 128-bit digest.
+_INLINE_KEY_CHARS = 1024
+
+# Regexes containing a literal at least this long are only run on prompts
+# that contain it; longer literals are truncated for the lookup.
+_MIN_LITERAL = 3
+_MAX_LITERAL = 32
+
+_TURKISH_I = {0x130: "i", 0x131: "i"}
+
+_GLOBAL_FLAGS = re.compile(r"\(\?([aiLmsux]+)\)")
+_FLAG_BITS = {
+    "a": re.ASCII,
+    "i": re.IGNORECASE,
+    "L": re.LOCALE,
+    "m": re.MULTILINE,
+    "s": re.DOTALL,
+    "u": re.UNICODE,
+    "x": re.VERBOSE,
+}
+
+
+class PolicyViolation(Exception):
+    """Raised when a prompt violates content policy."""
+
+    pass
+
+
+class PolicyVerdict(NamedTuple):
+    """Result of scanning a prompt.
+
+    Verdicts are immutable because cached ones are shared between callers.
+
+    Attributes:
+        allowed: Whether the prompt passed the policy.
+        tokens: Estimated token count of the prompt.
+        matched_terms: Blocked terms found in the prompt.
+        matched_patterns: Blocked patterns found in the prompt, in config order.
+    """
+
+    allowed: bool
+    tokens: int
+    matched_terms: Tuple[str, ...] = ()
+    matched_patterns: Tuple[str, ...] = ()
+
+
+class _TermAutomaton:
+    """Aho-Corasick automaton over tokens.
+
+    Terms and prompts are split into tokens by the same regex, so terms
+    match whole tokens (or whole token sequences).
+    """
+
+    def __init__(self, terms: Sequence[str], tokens: Pattern[str]):
+        self._tokens = tokens
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[str]] = [[]]
+
+        for term in terms:
+            state = 0
+            for word in tokens.findall(_normalize(term)):
+                nxt = self._goto[state].get(word)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[state][word] = nxt
+                state = nxt
+            if term not in self._output[state]:
+                self._output[state].append(term)
+
+        # Breadth-first pass to fill failure links and merge outputs.
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and word not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(word, 0)
+                self._output[nxt] = self._output[nxt] + self._output[self._fail[nxt]]
+
+    def __len__(self) -> int:
+        return len(self._goto) - 1
+
+    def step(self, state: int, text: str, found: List[str]) -> int:
+        """Advance the automaton over normalized text.
+
+        Args:
+            state: State to resume from; 0 for a new scan.
+            text: Text from :func:`_normalize`, ending at a token boundary.
+            found: List that matched terms are appended to.
+
+        Returns:
+            State to resume from for the next text.
+        """
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        root = goto[0]
+        for word in self._tokens.findall(text):
+            if state:
+                while state and word not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(word, 0)
+            else:
+                state = root.get(word, 0)
+            if state and output[state]:
+                found.extend(output[state])
+        return state
+
+
+class PolicyScanner:
+    """Screens prompts against blocked terms and regular expressions.
+
+    Literal terms are compiled into an Aho-Corasick automaton. A regex with
+    a literal that every match contains (such as "acct" in ``acct-\\d{6}``)
+    is only run on prompts containing that literal; one trie-shaped regex
+    finds those literals in a single pass. The remaining regexes are merged
+    into one alternation, so a clean prompt is scanned once for all of
+    them; those with capturing groups keep their own group numbers and
+    names, so they are searched one by one instead.
+    """
+
+    def __init__(
+        self,
+        blocked_terms: Optional[Sequence[str]] = None,
+        blocked_patterns: Optional[Sequence[str]] = None,
+        cache_size: int = 1024,
+        metrics: Optional[Metrics] = None,
+    ):
+        """Initialize policy scanner.
+
+        Args:
+            blocked_terms: Words or phrases to block, matched case-insensitively
+                as whole words.
+            blocked_patterns: Regular expressions to block.
+            cache_size: Number of verdicts to cache by prompt hash; 0 disables.
+            metrics: Optional metrics registry to publish decisions to.
+
+        Raises:
+            ValueError: If a blocked term has no words or symbols, or a
+                blocked pattern is not a valid regular expression.
+        """
+        terms = list(blocked_terms or [])
+        words: List[str] = []
+        symbols: List[str] = []
+        for term in terms:
+            normalized = _normalize(term)
+            tokens = _TOKEN.findall(normalized)
+            if not tokens:
+                raise ValueError(f"Blocked term has no words or symbols: {term!r}")
+            (words if tokens == _WORD.findall(normalized) else symbols).append(term)
+        self._terms = _TermAutomaton(words, _WORD)
+        self._symbol_terms = _TermAutomaton(symbols, _TOKEN)
+        self._term_order: Dict[str, int] = {}
+        for index, term in enumerate(terms):
+            self._term_order.setdefault(term, index)
+        self._patterns: List[Pattern[str]] = [_compile(p) for p in blocked_patterns or []]
+        self._pattern_order: Dict[str, int] = {}
+        for index, pattern in enumerate(self._patterns):
+            self._pattern_order.setdefault(pattern.pattern, index)
+        # Capturing groups make sre copy its marks on every branch, which is
+        # quadratic in the number of patterns, so the alternation is built
+        # from non-capturing groups and the matching rule is looked up only
+        # once a match is found.
+        self._combinable: List[Pattern[str]] = []
+        self._separate: List[Pattern[str]] = []
+        self._by_literal: Dict[str, List[int]] = {}
+        branches = []
+        for index, pattern in enumerate(self._patterns):
+            literal = _required_literal(pattern)
+            if literal:
+                self._by_literal.setdefault(literal, []).append(index)
+                continue
+            branch = _scoped(pattern)
+            if branch is None:
+                self._separate.append(pattern)
+            else:
+                self._combinable.append(pattern)
+                branches.append(branch)
+        self._combined: Optional[Pattern[str]] = None
+        if branches:
+            self._combined = re.compile("|".join(branches))
+        # The lookahead finds overlapping literals; at each position the
+        # trie prefers the longest one, and shorter ones are its prefixes.
+        self._literals: Optional[Pattern[str]] = None
+        if self._by_literal:
+            self._literals = re.compile(f"(?=({_trie(self._by_literal)}))")
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Union[str, bytes], PolicyVerdict]" = OrderedDict()
+        self._sampler: Optional[LatencySampler] = None
+        self.metrics = metrics
+        if metrics is not None:
+            self._register_metrics(metrics)
+
+    @classmethod
+    def from_config(cls, config: Config, **kwargs) -> "PolicyScanner":
+        """Create a scanner from config.
+
+        Args:
+            config: Config with blocked terms and patterns.
+            **kwargs: Extra arguments passed to the constructor.
+
+        Returns:
+            PolicyScanner instance.
+        """
+        return cls(
+            blocked_terms=config.blocked_terms,
+            blocked_patterns=config.blocked_patterns,
+            **kwargs,
+        )
+
+    def scan(self, text: str) -> PolicyVerdict:
+        """Scan a prompt and count its tokens.
+
+        Args:
+            text: Prompt text.
+
+        Returns:
+            Verdict with matched rules and the token count.
+        """
+        if self.cache_size:
+            key = _cache_key(text)
+            verdict = self._cache.get(key)
+            if verdict is not None:
+                try:
+                    self._cache.move_to_end(key)
+                except KeyError:
+                    pass
+                if self.metrics is not None:
+                    next(self._cache_hits)
+                self._record(verdict)
+                return verdict
+
+        sampler = self._sampler
+        start = None
+        if sampler is not None:
+            sampler.remaining -= 1
+            if sampler.remaining <= 0:
+                start = sampler.start()
+        verdict = self._scan(text)
+        if start is not None:
+            sampler.stop(start)
+
+        if self.cache_size:
+            self._cache[key] = verdict
+            if len(self._cache) > self.cache_size:
+                try:
+                    self._cache.popitem(last=False)
+                except KeyError:
+                    pass
+        self._record(verdict)
+        return verdict
+
+    def check(self, text: str) -> int:
+        """Scan a prompt and raise if it is blocked.
+
+        Args:
+            text: Prompt text.
+
+        Returns:
+            Estimated token count.
+
+        Raises:
+            PolicyViolation: If the prompt matches a blocked term or pattern.
+        """
+        verdict = self.scan(text)
+        if not verdict.allowed:
+            raise PolicyViolation(_describe(verdict))
+        return verdict.tokens
+
+    def stream(self, overlap: int = 256) -> "PolicyStream":
+        """Start scanning a prompt that arrives in chunks.
+
+        Args:
+            overlap: Longest span, in characters, a blocked pattern needs to
+                see from the start of its match, lookaheads included.
+
+        Returns:
+            PolicyStream to feed chunks into.
+        """
+        return PolicyStream(self, overlap)
+
+    def _scan(self, text: str) -> PolicyVerdict:
+        terms: List[str] = []
+        self._match_terms(_normalize(text), (0, 0), terms)
+        patterns: List[str] = []
+        self._match_patterns(text, 0, len(text) + 1, patterns)
+        return self._verdict(len(text.split()), terms, patterns)
+
+    def _match_terms(
+        self, text: str, states: Tuple[int, int], found: List[str]
+    ) -> Tuple[int, int]:
+        # Appends terms matched in normalized text to found and returns the
+        # automaton states to resume from.
+        words, symbols = states
+        if len(self._terms):
+            words = self._terms.step(words, text, found)
+        if len(self._symbol_terms):
+            symbols = self._symbol_terms.step(symbols, text, found)
+        return words, symbols
+
+    def _match_patterns(self, text: str, pos: int, limit: int, found: List[str]) -> None:
+        # Appends patterns with a match starting in [pos, limit) to found.
+        # Searching from pos rather than slicing keeps "\b", "^" and
+        # lookbehinds seeing the text before it.
+        if self._combined is not None:
+            # No combinable pattern matches before the alternation's first
+            # hit; from there each one searches once on its own, so matches
+            # overlapping another pattern's are found in linear time.
+            match = self._combined.search(text, pos)
+            if match is not None and match.start() < limit:
+                start = match.start()
+                for pattern in self._combinable:
+                    if pattern.pattern not in found:
+                        match = pattern.search(text, start)
+                        if match is not None and match.start() < limit:
+                            found.append(pattern.pattern)
+        separate = self._separate
+        if self._literals is not None:
+            candidates = set()
+            for longest in set(self._literals.findall(_fold(text))):
+                for end in range(_MIN_LITERAL, len(longest) + 1):
+                    candidates.update(self._by_literal.get(longest[:end], ()))
+            if candidates:
+                separate = [self._patterns[i] for i in sorted(candidates)] + separate
+        for pattern in separate:
+            if pattern.pattern not in found:
+                match = pattern.search(text, pos)
+                if match is not None and match.start() < limit:
+                    found.append(pattern.pattern)
+
+    def _verdict(self, tokens: int, terms: List[str], patterns: List[str]) -> PolicyVerdict:
+        # Rules are reported once each, in config order, however they were found.
+        return PolicyVerdict(
+            not terms and not patterns,
+            tokens,
+            tuple(sorted(set(terms), key=self._term_order.__getitem__)),
+            tuple(sorted(set(patterns), key=self._pattern_order.__getitem__)),
+        )
+
+    def _record(self, verdict: PolicyVerdict) -> None:
+        if self.metrics is not None:
+            next(self._allowed if verdict.allowed else self._denied)
+
+    def _register_metrics(self, metrics: Metrics) -> None:
+        self._allowed = metrics.counter(POLICY_DECISIONS, _ALLOW).ticks
+        self._denied = metrics.counter(POLICY_DECISIONS, _DENY).ticks
+        self._cache_hits = metrics.counter(POLICY_CACHE_HITS).ticks
+        self._sampler = metrics.sampler(POLICY_SECONDS)
+
+
+class PolicyStream:
+    """Incremental scanner for prompts that arrive in chunks.
+
+    Regexes only report a match once ``overlap`` characters past its start
+    have arrived, so "\b", "$" and lookaheads at a chunk edge see the same
+    text :meth:`PolicyScanner.scan` would. The final verdict from
+    :meth:`finish` matches ``scan`` on the joined chunks for any pattern
+    whose match, lookarounds included, fits in ``overlap`` characters.
+    """
+
+    def __init__(self, scanner: PolicyScanner, overlap: int = 256):
+        """Initialize stream.
+
+        Args:
+            scanner: Scanner whose rules to apply.
+            overlap: Characters of lookahead a pattern match is given
+                before it is reported; also kept for lookbehinds.
+
+        Raises:
+            ValueError: If overlap is less than 1.
+        """
+        if overlap < 1:
+            raise ValueError("overlap must be at least 1")
+        self._scanner = scanner
+        self._overlap = overlap
+        self._states = (0, 0)
+        self._pending = ""
+        self._buffer = ""
+        self._pos = 0
+        self._tokens = 0
+        self._terms: List[str] = []
+        self._patterns: List[str] = []
+        self._final: Optional[PolicyVerdict] = None
+
+    def feed(self, chunk: str) -> PolicyVerdict:
+        """Scan the next chunk.
+
+        A word cut off at the end of the chunk is held back until the next
+        chunk or :meth:`finish`, and so are the last ``overlap`` characters
+        for regexes.
+
+        Args:
+            chunk: Next piece of the prompt.
+
+        Returns:
+            Verdict for the prompt so far.
+        """
+        text = self._pending + _normalize(chunk)
+        words = text.split()
+        if words and not text[-1].isspace():
+            self._pending = words.pop()
+            text = text[: len(text) - len(self._pending)]
+        else:
+            self._pending = ""
+        self._consume(text, len(words))
+
+        self._buffer += chunk
+        limit = len(self._buffer) - self._overlap
+        if limit > self._pos:
+            self._scanner._match_patterns(self._buffer, self._pos, limit, self._patterns)
+            self._pos = limit
+            # Keep overlap characters before the next start for lookbehinds.
+            cut = max(self._pos - self._overlap, 0)
+            self._buffer = self._buffer[cut:]
+            self._pos -= cut
+        return self._verdict()
+
+    def finish(self) -> PolicyVerdict:
+        """Scan the held-back text and return the final verdict.
+
+        The final verdict is counted in the scanner's decision counts once,
+        however often this is called.
+
+        Returns:
+            Verdict for the whole prompt.
+        """
+        if self._final is None:
+            if self._pending:
+                self._consume(self._pending, 1)
+                self._pending = ""
+            self._scanner._match_patterns(
+                self._buffer, self._pos, len(self._buffer) + 1, self._patterns
+            )
+            self._buffer = ""
+            self._final = self._verdict()
+            self._scanner._record(self._final)
+        return self._final
+
+    def _consume(self, text: str, words: int) -> None:
+        self._tokens += words
+        found: List[str] = []
+        self._states = self._scanner._match_terms(text, self._states, found)
+        for term in found:
+            if term not in self._terms:
+                self._terms.append(term)
+
+    def _verdict(self) -> PolicyVerdict:
+        return self._scanner._verdict(self._tokens, self._terms, self._patterns)
+
+
+def _cache_key(text: str) -> Union[str, bytes]:
+    if len(text) <= _INLINE_KEY_CHARS:
+        return text
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+def _compile(source: str) -> Pattern[str]:
+    try:
+        return re.compile(source)
+    except re.error as exc:
+        raise ValueError(f"Invalid blocked pattern {source!r}: {exc}") from exc
+
+
+def _scoped(pattern: Pattern[str]) -> Optional[str]:
+    # Returns the pattern as a branch for the combined alternation, or None
+    # if it has to be searched on its own. Group numbers, names and
+    # backreferences would clash or shift once merged with other patterns.
+    if pattern.groups:
+        return None
+    # Leading global flags such as "(?i)" are only legal at the start of the
+    # whole expression, so turn them into a scoped group for the alternation.
+    source = pattern.pattern
+    letters = ""
+    match = _GLOBAL_FLAGS.match(source)
+    while match:
+        letters += match.group(1)
+        source = source[match.end() :]
+        match = _GLOBAL_FLAGS.match(source)
+    expected = re.UNICODE
+    for letter in letters:
+        expected |= _FLAG_BITS[letter]
+    # Python < 3.11 accepts global flags mid-pattern; they would leak into
+    # every other branch.
+    if pattern.flags | re.UNICODE != expected:
+        return None
+    # A verbose pattern may end in a comment that would swallow the ")".
+    close = "\n)" if pattern.flags & re.VERBOSE else ")"
+    return f"(?{letters}:{source}{close}" if letters else f"(?:{source}{close}"
+
+
+def _required_literal(pattern: Pattern[str]) -> str:
+    # Longest run of characters every match contains, folded like _fold;
+    # empty if there is none long enough to be worth looking up.
+    try:
+        parsed = _sre_parse.parse(pattern.pattern, pattern.flags)
+    except Exception:
+        return ""
+    # Case-insensitive matching of non-ASCII characters goes beyond what
+    # casefold() covers, so only ASCII characters count for those.
+    ascii_only = bool(pattern.flags & re.IGNORECASE)
+    best = run = ""
+    for op, arg in parsed:
+        if op == _sre_parse.LITERAL and (not ascii_only or arg < 128):
+            run += chr(arg)
+            if len(run) > len(best):
+                best = run
+        else:
+            run = ""
+    if len(best) < _MIN_LITERAL:
+        return ""
+    return _fold(best)[:_MAX_LITERAL]
+
+
+def _fold(text: str) -> str:
+    # Every character is mapped on its own, so a literal in a text is still
+    # in it after folding both. The Turkish dotted and dotless i are the only
+    # characters IGNORECASE matches to an ASCII letter that casefold() does
+    # not turn into exactly that letter.
+    return text.translate(_TURKISH_I).casefold()
+
+
+def _trie(literals: Dict[str, List[int]]) -> str:
+    root: Dict[str, dict] = {}
+    for literal in literals:
+        node = root
+        for char in literal:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    return _trie_branch(root)
+
+
+def _trie_branch(node: Dict[str, dict]) -> str:
+    # Longer literals are tried first, so the match is the longest one.
+    branches = [re.escape(char) + _trie_branch(child) for char, child in node.items() if char]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if "" in node:
+        body = f"(?:{body})?"
+    return body
+
+
+def _normalize(text: str) -> str:
+    return text.lower().translate(_QUOTES)
+
+
+def _describe(verdict: PolicyVerdict) -> str:
+    reasons = [f"blocked term: {t}" for t in verdict.matched_terms]
+    reasons += [f"blocked pattern: {p}" for p in verdict.matched_patterns]
+    return "Content policy violation (" + ", ".join(reasons) + ")"
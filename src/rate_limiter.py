@@ -1,7 +1,13 @@
 """Rate limiting using token bucket algorithm."""
 
 import time
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+from src.metrics import Metrics, RATE_LIMIT_DECISIONS, RATE_LIMIT_SECONDS, RATE_LIMIT_USERS
+
+_ALLOW = (("decision", "allow"), ("reason", "ok"))
+_DENY_MINUTE = (("decision", "deny"), ("reason", "minute_limit"))
+_DENY_HOUR = (("decision", "deny"), ("reason", "hour_limit"))
 
 
 class RateLimitExceeded(Exception):
@@ -13,16 +19,25 @@ class RateLimitExceeded(Exception):
 class RateLimiter:
     """Token bucket rate limiter with per-minute and per-hour limits."""
 
-    def __init__(self, requests_per_minute: int = 60, requests_per_hour: int = 1000):
+    def __init__(
+        self,
+        requests_per_minute: int = 60,
+        requests_per_hour: int = 1000,
+        metrics: Optional[Metrics] = None,
+    ):
         """Initialize rate limiter.
 
         Args:
             requests_per_minute: Maximum requests allowed per minute.
             requests_per_hour: Maximum requests allowed per hour.
+            metrics: Optional metrics registry to publish decisions to.
         """
         self.requests_per_minute = requests_per_minute
         self.requests_per_hour = requests_per_hour
         self._users: Dict[str, Dict[str, Any]] = {}
+        self.metrics = metrics
+        if metrics is not None:
+            self._register_metrics(metrics)
 
     def check_limit(self, user_id: str) -> bool:
         """Check if request is allowed for user.
@@ -89,4 +104,67 @@ class RateLimiter:
             user_id: Unique identifier for the user.
         """
         if user_id in self._users:
+            if self.metrics is not None:
+                self._allowed.inc(self._users[user_id]["hour_count"])
             del self._users[user_id]
+
+    def _register_metrics(self, metrics: Metrics) -> None:
+        # Every allowed check adds one to its user's hour_count, so allows are
+        # read from the windows and only counted here when a window is dropped.
+        self._allowed = metrics.counter(RATE_LIMIT_DECISIONS, _ALLOW)
+        self._allowed.track(self._allowed_in_windows)
+        self._denied_minute = metrics.counter(RATE_LIMIT_DECISIONS, _DENY_MINUTE).ticks
+        self._denied_hour = metrics.counter(RATE_LIMIT_DECISIONS, _DENY_HOUR).ticks
+        self._sampler = metrics.sampler(RATE_LIMIT_SECONDS)
+        metrics.register_gauge(RATE_LIMIT_USERS, lambda: len(self._users))
+        # Shadow check_limit on this instance only; limiters without metrics
+        # keep running the plain method.
+        self.check_limit = self._check_limit_instrumented
+
+    def _check_limit_instrumented(self, user_id: str) -> bool:
+        """check_limit plus decision counters and sampled latency."""
+        sampler = self._sampler
+        start = None
+        if sampler is not None:
+            sampler.remaining -= 1
+            if sampler.remaining <= 0:
+                start = sampler.start()
+
+        current_time = time.time()
+
+        if user_id not in self._users:
+            self._users[user_id] = {
+                "minute_count": 0,
+                "hour_count": 0,
+                "minute_reset": current_time + 60,
+                "hour_reset": current_time + 3600,
+            }
+
+        user = self._users[user_id]
+
+        if current_time >= user["minute_reset"]:
+            user["minute_count"] = 0
+            user["minute_reset"] = current_time + 60
+
+        if current_time >= user["hour_reset"]:
+            self._allowed.inc(user["hour_count"])
+            user["hour_count"] = 0
+            user["hour_reset"] = current_time + 3600
+
+        if user["minute_count"] >= self.requests_per_minute:
+            next(self._denied_minute)
+            allowed = False
+        elif user["hour_count"] >= self.requests_per_hour:
+            next(self._denied_hour)
+            allowed = False
+        else:
+            user["minute_count"] += 1
+            user["hour_count"] += 1
+            allowed = True
+
+        if start is not None:
+            sampler.stop(start)
+        return allowed
+
+    def _allowed_in_windows(self) -> int:
+        return sum(user["hour_count"] for user in list(self._users.values()))
@@ -1,15 +1,37 @@
 """Simple character-based token counter."""
 
+from typing import Optional
 
-def count_tokens(text: str) -> int:
+from src.metrics import Metrics, TOKENIZER_CALLS, TOKENIZER_SECONDS, TOKENIZER_TOKENS
+
+
+def count_tokens(text: str, metrics: Optional[Metrics] = None) -> int:
     """Count tokens using simple word-based estimator.
 
     Args:
         text: Input text to count tokens for.
+        metrics: Optional metrics registry to record calls into.
 
     Returns:
         Estimated token count (1 token per word).
     """
+    if metrics is not None:
+        return _count_tokens_instrumented(text, metrics)
     if not text:
         return 0
     return len(text.split())
+
+
+def _count_tokens_instrumented(text: str, metrics: Metrics) -> int:
+    sampler = metrics.sampler(TOKENIZER_SECONDS)
+    start = None
+    if sampler is not None:
+        sampler.remaining -= 1
+        if sampler.remaining <= 0:
+            start = sampler.start()
+    tokens = count_tokens(text)
+    if start is not None:
+        sampler.stop(start)
+    metrics.inc(TOKENIZER_CALLS)
+    metrics.inc(TOKENIZER_TOKENS, value=tokens)
+    return tokens
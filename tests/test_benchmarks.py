@@ -0,0 +1,86 @@
+"""Tests for benchmark traffic generators and regression comparison."""
+
+import json
+import os
+import tempfile
+from collections import Counter
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+
+from benchmarks.suite import compare, main
+from benchmarks.traffic import ZipfGenerator, new_users, prompt, zipf_users
+
+
+def test_zipf_samples_within_population():
+    """Samples stay within the population."""
+    generator = ZipfGenerator(50, seed=1)
+    samples = [generator.sample() for _ in range(5000)]
+    assert min(samples) >= 0
+    assert max(samples) < 50
+
+
+def test_zipf_matches_expected_head_probability():
+    """The most popular rank gets about 1/H(n) of the traffic."""
+    population, exponent, draws = 5, 1.0, 20000
+    generator = ZipfGenerator(population, exponent, seed=3)
+    counts = Counter(generator.sample() for _ in range(draws))
+    harmonic = sum(1 / k**exponent for k in range(1, population + 1))
+    assert counts[0] / draws == pytest.approx(1 / harmonic, abs=0.02)
+    assert counts[0] > counts[1] > counts[4]
+
+
+def test_zipf_users_is_deterministic():
+    """Same seed produces the same traffic."""
+    assert zipf_users(1000, 100, seed=7) == zipf_users(1000, 100, seed=7)
+
+
+def test_zipf_rejects_empty_population():
+    """Population must be positive."""
+    with pytest.raises(ValueError):
+        ZipfGenerator(0)
+
+
+def test_new_users_are_distinct():
+    """New user IDs start past the existing population."""
+    assert new_users(3, 10) == ["user10", "user11", "user12"]
+
+
+def test_prompt_word_count():
+    """Generated prompts have the requested number of words."""
+    assert len(prompt(100).split()) == 100
+
+
+def test_compare_flags_regressions():
+    """Slowdowns beyond the threshold are flagged."""
+    baseline = {"fast": {"min_ns": 100.0}, "slow": {"min_ns": 100.0}}
+    current = {"fast": {"min_ns": 105.0}, "slow": {"min_ns": 150.0}, "added": {"min_ns": 1.0}}
+    assert compare(baseline, current, threshold=10.0) == ["slow"]
+
+
+def test_compare_reports_missing_benchmarks():
+    """Benchmarks absent from the current run are reported and fail the gate."""
+    baseline = {"kept": {"min_ns": 100.0}, "dropped": {"min_ns": 100.0}}
+    current = {"kept": {"min_ns": 100.0}}
+    with patch("sys.stderr", new_callable=StringIO) as stderr:
+        assert compare(baseline, current, threshold=10.0) == ["dropped"]
+    assert "MISSING" in stderr.getvalue()
+
+
+def test_compare_table_keeps_stdout_clean():
+    """The comparison table goes to stderr, leaving stdout for JSON."""
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for name, value in (("baseline", 100.0), ("current", 200.0)):
+            path = os.path.join(tmp, f"{name}.json")
+            with open(path, "w") as f:
+                json.dump({"results": {"check": {"min_ns": value}}}, f)
+            paths.append(path)
+
+        argv = ["suite", "compare"] + paths
+        with patch("sys.argv", argv), patch("sys.stdout", new_callable=StringIO) as stdout:
+            with patch("sys.stderr", new_callable=StringIO) as stderr:
+                assert main() == 1
+        assert stdout.getvalue() == ""
+        assert "REGRESSION" in stderr.getvalue()
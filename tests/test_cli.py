@@ -113,3 +113,80 @@ def test_cli_reset():
                 assert "Reset" in mock_stdout.getvalue()
     finally:
         os.unlink(temp_file)
+
+
+def test_cli_check_writes_metrics_file():
+    """Test CLI check command - writes Prometheus metrics."""
+    with tempfile.NamedTemporaryFile(mode="w", delete=False, suffix=".json") as f:
+        json.dump({"requests_per_minute": 60, "requests_per_hour": 1000, "token_budget": 100000}, f)
+        temp_file = f.name
+    metrics_file = temp_file + ".prom"
+
+    try:
+        argv = ["cli", "-c", temp_file, "check", "user1", "100", "--metrics-file", metrics_file]
+        with patch("sys.argv", argv):
+            with patch("sys.stdout", new_callable=StringIO):
+                assert main() == 0
+        with open(metrics_file) as f:
+            text = f.read()
+        assert 'gate_rate_limit_decisions_total{decision="allow",reason="ok"} 1' in text
+        assert "gate_budget_tracked_users 1" in text
+    finally:
+        os.unlink(temp_file)
+        if os.path.exists(metrics_file):
+            os.unlink(metrics_file)
+
+
+def test_cli_scan_writes_metrics_file():
+    """Test CLI scan command - writes Prometheus metrics for the call."""
+    with tempfile.NamedTemporaryFile(mode="w", delete=False, suffix=".json") as f:
+        json.dump({"blocked_terms": ["forbidden"]}, f)
+        temp_file = f.name
+    metrics_file = temp_file + ".prom"
+
+    try:
+        argv = ["cli", "-c", temp_file, "scan", "forbidden", "--metrics-file", metrics_file]
+        with patch("sys.argv", argv):
+            with patch("sys.stdout", new_callable=StringIO):
+                assert main() == 1
+        with open(metrics_file) as f:
+            text = f.read()
+        assert 'gate_policy_decisions_total{decision="deny",reason="content_policy"} 1' in text
+    finally:
+        os.unlink(temp_file)
+        if os.path.exists(metrics_file):
+            os.unlink(metrics_file)
+
+
+def test_cli_scan_blocked():
+    """Test CLI scan command - blocked by content policy."""
+    with tempfile.NamedTemporaryFile(mode="w", delete=False, suffix=".json") as f:
+        json.dump({"blocked_terms": ["forbidden"], "blocked_patterns": []}, f)
+        temp_file = f.name
+
+    try:
+        with patch("sys.argv", ["cli", "-c", temp_file, "scan", "a forbidden prompt"]):
+            with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+                result = main()
+                assert result == 1
+                output = mock_stdout.getvalue()
+                assert "Blocked - tokens: 3" in output
+                assert "Blocked term: forbidden" in output
+    finally:
+        os.unlink(temp_file)
+
+
+def test_cli_scan_stdin():
+    """Test CLI scan command - reads prompt from stdin."""
+    with tempfile.NamedTemporaryFile(mode="w", delete=False, suffix=".json") as f:
+        json.dump({"blocked_terms": ["forbidden"]}, f)
+        temp_file = f.name
+
+    try:
+        with patch("sys.argv", ["cli", "-c", temp_file, "scan"]):
+            with patch("sys.stdin", StringIO("hello world")):
+                with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+                    assert main() == 0
+                    assert "Allowed - tokens: 2" in mock_stdout.getvalue()
+    finally:
+        os.unlink(temp_file)
@@ -53,3 +53,19 @@ def test_config_to_dict():
     config = Config(requests_per_minute=30)
     d = config.to_dict()
     assert d["requests_per_minute"] == 30
+
+
+def test_config_policy_rules_round_trip():
+    """Blocked terms and patterns persist."""
+    with tempfile.NamedTemporaryFile(mode="w", delete=False, suffix=".json") as f:
+        temp_file = f.name
+
+    try:
+        config = Config(blocked_terms=["bad"], blocked_patterns=[r"\d+"])
+        save_config(config, temp_file)
+
+        loaded = load_config(temp_file)
+        assert loaded.blocked_terms == ["bad"]
+        assert loaded.blocked_patterns == [r"\d+"]
+    finally:
+        os.unlink(temp_file)
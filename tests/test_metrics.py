@@ -0,0 +1,208 @@
+"""Tests for metrics instrumentation."""
+
+import os
+import tempfile
+import threading
+
+import pytest
+
+from src.budget import BudgetManager
+from src.metrics import Metrics, RATE_LIMIT_DECISIONS, BUDGET_DECISIONS
+from src.rate_limiter import RateLimiter
+from src.tokenizer import count_tokens
+
+ALLOWED = (("decision", "allow"), ("reason", "ok"))
+
+
+def test_rate_limiter_decision_counts_by_reason():
+    """Allows and denials are counted per reason."""
+    metrics = Metrics()
+    limiter = RateLimiter(requests_per_minute=2, requests_per_hour=3, metrics=metrics)
+    for _ in range(3):
+        limiter.check_limit("user1")
+    limiter.check_limit("user2")
+    limiter.check_limit("user2")
+    limiter._users["user1"]["minute_count"] = 0
+    limiter.check_limit("user1")
+    limiter.check_limit("user1")
+
+    assert metrics.get_counter(RATE_LIMIT_DECISIONS, ALLOWED) == 5
+    for reason in ("minute_limit", "hour_limit"):
+        labels = (("decision", "deny"), ("reason", reason))
+        assert metrics.get_counter(RATE_LIMIT_DECISIONS, labels) == 1
+
+
+def test_rate_limiter_reset_keeps_allowed_count():
+    """Resetting a user does not lose its allowed decisions."""
+    metrics = Metrics()
+    limiter = RateLimiter(requests_per_minute=10, requests_per_hour=100, metrics=metrics)
+    limiter.check_limit("user1")
+    limiter.check_limit("user1")
+    limiter.reset("user1")
+    assert metrics.get_counter(RATE_LIMIT_DECISIONS, ALLOWED) == 2
+
+
+def test_rate_limiter_hour_rollover_keeps_allowed_count():
+    """Allows from an expired hour window are still counted."""
+    metrics = Metrics()
+    limiter = RateLimiter(requests_per_minute=10, requests_per_hour=100, metrics=metrics)
+    limiter.check_limit("user1")
+    limiter.check_limit("user1")
+    limiter._users["user1"]["hour_reset"] = 0
+    limiter.check_limit("user1")
+    assert limiter._users["user1"]["hour_count"] == 1
+    assert metrics.get_counter(RATE_LIMIT_DECISIONS, ALLOWED) == 3
+
+
+def test_disabled_metrics_run_plain_methods():
+    """Without metrics the uninstrumented class methods are called."""
+    limiter = RateLimiter()
+    manager = BudgetManager()
+    assert limiter.check_limit.__func__ is RateLimiter.check_limit
+    assert manager.check_budget.__func__ is BudgetManager.check_budget
+    assert not hasattr(limiter, "_sampler")
+
+    limiter = RateLimiter(metrics=Metrics())
+    manager = BudgetManager(metrics=Metrics())
+    assert limiter.check_limit.__func__ is RateLimiter._check_limit_instrumented
+    assert manager.check_budget.__func__ is BudgetManager._check_budget_instrumented
+
+
+def test_shared_metrics_sum_components():
+    """Components registered on one registry are summed, not replaced."""
+    metrics = Metrics()
+    first = RateLimiter(requests_per_minute=10, requests_per_hour=100, metrics=metrics)
+    second = RateLimiter(requests_per_minute=10, requests_per_hour=100, metrics=metrics)
+    first.check_limit("user1")
+    second.check_limit("user2")
+    second.check_limit("user3")
+
+    assert metrics.get_counter(RATE_LIMIT_DECISIONS, ALLOWED) == 3
+    assert "gate_rate_limit_tracked_users 3" in metrics.render_prometheus()
+
+
+def test_rate_limiter_publishes_counters_and_gauge():
+    """Registered rate limiter metrics appear in the export."""
+    metrics = Metrics()
+    limiter = RateLimiter(requests_per_minute=1, requests_per_hour=100, metrics=metrics)
+    limiter.check_limit("user1")
+    limiter.check_limit("user1")
+    limiter.check_limit("user2")
+
+    assert metrics.get_counter(RATE_LIMIT_DECISIONS, ALLOWED) == 2
+    text = metrics.render_prometheus()
+    assert "# TYPE gate_rate_limit_decisions_total counter" in text
+    assert 'gate_rate_limit_decisions_total{decision="deny",reason="minute_limit"} 1' in text
+    assert "gate_rate_limit_tracked_users 2" in text
+
+
+def test_budget_manager_publishes_counters():
+    """Budget decisions are published by reason."""
+    metrics = Metrics()
+    manager = BudgetManager(token_budget=100, metrics=metrics)
+    manager.check_budget("user1", 60)
+    manager.check_budget("user1", 60)
+
+    assert metrics.get_counter(BUDGET_DECISIONS, ALLOWED) == 1
+    assert 'reason="budget_exceeded"} 1' in metrics.render_prometheus()
+
+
+def test_budget_sampled_latency_histogram():
+    """Budget checks are sampled into their own histogram."""
+    metrics = Metrics(sample_rate=2)
+    manager = BudgetManager(token_budget=1000, metrics=metrics)
+    for _ in range(4):
+        manager.check_budget("user1", 10)
+    assert "gate_budget_check_seconds_count 2" in metrics.render_prometheus()
+
+
+def test_sampled_latency_histogram():
+    """One in N calls is timed into the histogram."""
+    metrics = Metrics(sample_rate=4)
+    limiter = RateLimiter(requests_per_minute=100, requests_per_hour=100, metrics=metrics)
+    for _ in range(8):
+        limiter.check_limit("user1")
+
+    text = metrics.render_prometheus()
+    assert "# TYPE gate_rate_limit_check_seconds histogram" in text
+    assert 'gate_rate_limit_check_seconds_bucket{le="+Inf"} 2' in text
+    assert "gate_rate_limit_check_seconds_count 2" in text
+
+
+def test_histogram_buckets_are_cumulative():
+    """Bucket counts include all smaller buckets."""
+    metrics = Metrics(buckets=(0.1, 1.0))
+    metrics.observe("latency", 0.05)
+    metrics.observe("latency", 0.5)
+    metrics.observe("latency", 5.0)
+
+    text = metrics.render_prometheus()
+    assert 'latency_bucket{le="0.1"} 1' in text
+    assert 'latency_bucket{le="1.0"} 2' in text
+    assert 'latency_bucket{le="+Inf"} 3' in text
+    assert "latency_sum 5.55" in text
+
+
+def test_count_tokens_metrics():
+    """Tokenizer calls and tokens are counted."""
+    metrics = Metrics()
+    assert count_tokens("hello world", metrics=metrics) == 2
+    count_tokens("a b c", metrics=metrics)
+    assert metrics.get_counter("gate_tokenizer_calls_total") == 2
+    assert metrics.get_counter("gate_tokenizer_tokens_total") == 5
+
+
+def test_counters_exact_across_threads():
+    """Concurrent increments are not lost."""
+    metrics = Metrics()
+    manager = BudgetManager(token_budget=10**9, metrics=metrics)
+
+    def work():
+        for _ in range(20000):
+            manager.check_budget("user1", 1)
+            metrics.inc("tokens_total", value=2)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert metrics.get_counter(BUDGET_DECISIONS, ALLOWED) == 80000
+    assert metrics.get_counter("tokens_total") == 160000
+
+
+def test_sampler_shared_per_histogram():
+    """Components timing into one histogram share its countdown."""
+    metrics = Metrics(sample_rate=3)
+    assert metrics.sampler("latency") is metrics.sampler("latency")
+    assert Metrics().sampler("latency") is None
+    for text in ("a", "b c", "d", "e f g", "h", "i"):
+        count_tokens(text, metrics=metrics)
+    assert "gate_tokenizer_seconds_count 2" in metrics.render_prometheus()
+
+
+def test_label_values_are_escaped():
+    """Quotes and newlines in label values are escaped."""
+    metrics = Metrics()
+    metrics.inc("events_total", (("user", 'a"b\nc'),))
+    assert 'events_total{user="a\\"b\\nc"} 1' in metrics.render_prometheus()
+
+
+def test_write_prometheus():
+    """Metrics are written to a file."""
+    metrics = Metrics()
+    RateLimiter(metrics=metrics).check_limit("user1")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "gate.prom")
+        metrics.write_prometheus(path)
+        with open(path) as f:
+            assert f.read() == metrics.render_prometheus()
+        assert os.listdir(tmp) == ["gate.prom"]
+
+
+def test_negative_sample_rate_rejected():
+    """Sample rate must not be negative."""
+    with pytest.raises(ValueError):
+        Metrics(sample_rate=-1)
@@ -0,0 +1,321 @@
+"""Tests for content policy scanning."""
+
+import time
+
+import pytest
+
+from src.config import Config
+from src.metrics import Metrics, POLICY_CACHE_HITS, POLICY_DECISIONS
+from src.policy import PolicyScanner, PolicyViolation
+from src.tokenizer import count_tokens
+
+BLOCKED = (("decision", "deny"), ("reason", "content_policy"))
+
+
+def test_policy_allows_clean_prompt():
+    """Prompt without blocked content is allowed."""
+    scanner = PolicyScanner(blocked_terms=["forbidden"])
+    verdict = scanner.scan("hello world")
+    assert verdict.allowed is True
+    assert verdict.matched_terms == ()
+
+
+def test_policy_blocks_term_case_insensitively():
+    """Blocked term matches regardless of case and punctuation."""
+    scanner = PolicyScanner(blocked_terms=["Forbidden"])
+    verdict = scanner.scan("this is FORBIDDEN!")
+    assert verdict.allowed is False
+    assert verdict.matched_terms == ("Forbidden",)
+
+
+def test_policy_terms_match_whole_words():
+    """Terms do not match inside other words."""
+    scanner = PolicyScanner(blocked_terms=["ass"])
+    assert scanner.scan("a class assignment").allowed is True
+
+
+def test_policy_blocks_phrase():
+    """Multi-word terms match consecutive words."""
+    scanner = PolicyScanner(blocked_terms=["ignore previous instructions"])
+    assert scanner.scan("please ignore previous instructions now").allowed is False
+    assert scanner.scan("ignore the previous instructions").allowed is True
+
+
+def test_policy_overlapping_terms():
+    """Terms sharing words are all reported."""
+    scanner = PolicyScanner(blocked_terms=["b c d", "c", "a b c x"])
+    verdict = scanner.scan("a b c d")
+    assert verdict.matched_terms == ("b c d", "c")
+
+
+@pytest.mark.parametrize(
+    "term,text,blocked",
+    [
+        ("foo", "a foo-bar here", True),
+        ("bad word", "a bad,word here", True),
+        ("c++", "I like c and python", False),
+        ("c++", "I like C++ a lot", True),
+        ("!!!", "wow!!!", True),
+        ("don't", "I don’t know", True),
+        ("foo", "food", False),
+    ],
+)
+def test_policy_terms_split_on_punctuation(term, text, blocked):
+    """Terms and prompts are tokenized alike, punctuation included."""
+    scanner = PolicyScanner(blocked_terms=[term])
+    assert scanner.scan(text).allowed is not blocked
+
+
+@pytest.mark.parametrize("term", ["", "   "])
+def test_policy_rejects_empty_term(term):
+    """A term with no words or symbols would never match."""
+    with pytest.raises(ValueError, match="no words or symbols"):
+        PolicyScanner(blocked_terms=["fine", term])
+
+
+def test_policy_terms_reported_in_config_order():
+    """Scan and stream list matched terms in the order they were configured."""
+    scanner = PolicyScanner(blocked_terms=["c++", "bad", "x y"])
+    text = "x y then bad c++ code"
+    assert scanner.scan(text).matched_terms == ("c++", "bad", "x y")
+    stream = scanner.stream()
+    for chunk in ("x y th", "en ba", "d c+", "+ code"):
+        stream.feed(chunk)
+    assert stream.finish() == scanner.scan(text)
+
+
+def test_policy_blocks_pattern():
+    """Blocked regex is reported by its source."""
+    scanner = PolicyScanner(blocked_patterns=[r"\d{3}-\d{2}-\d{4}", r"jail\w*"])
+    verdict = scanner.scan("my ssn is 123-45-6789")
+    assert verdict.allowed is False
+    assert verdict.matched_patterns == (r"\d{3}-\d{2}-\d{4}",)
+
+
+def test_policy_pattern_global_flags():
+    """Leading global flags apply only to their own pattern."""
+    scanner = PolicyScanner(blocked_patterns=["(?i)secret", "abc"])
+    assert scanner.scan("a SECRET plan").matched_patterns == ("(?i)secret",)
+    assert scanner.scan("ABC").allowed is True
+
+
+def test_policy_patterns_with_named_groups():
+    """Patterns may reuse group names."""
+    scanner = PolicyScanner(blocked_patterns=[r"(?P<id>a\d)", r"(?P<id>b\d)"])
+    assert scanner.scan("b7").matched_patterns == (r"(?P<id>b\d)",)
+
+
+def test_policy_patterns_with_backreferences():
+    """Backreferences refer to the pattern's own groups."""
+    scanner = PolicyScanner(blocked_patterns=[r"(a)\1", r"(b)\1"])
+    assert scanner.scan("bb").matched_patterns == (r"(b)\1",)
+    assert scanner.scan("ab").allowed is True
+
+
+def test_policy_verbose_pattern_ending_in_comment():
+    """A trailing comment in a verbose pattern does not break the others."""
+    scanner = PolicyScanner(blocked_patterns=["(?x) secret  # comment", "abc"])
+    assert scanner.scan("a secret").matched_patterns == ("(?x) secret  # comment",)
+    assert scanner.scan("abc").matched_patterns == ("abc",)
+
+
+def test_policy_overlapping_pattern_matches():
+    """A pattern matching inside another pattern's match is reported."""
+    scanner = PolicyScanner(blocked_patterns=["a.c", "b.d"])
+    assert scanner.scan("abcd").matched_patterns == ("a.c", "b.d")
+
+
+@pytest.mark.parametrize(
+    "pattern,text",
+    [
+        (r"[A-Za-z0-9+/]{40,}={0,2}", "QUJD" * 10000),
+        (r"\w+", "a" * 40000),
+    ],
+)
+def test_policy_long_single_match_is_linear(pattern, text):
+    """A match spanning a long prompt does not restart at every character."""
+    scanner = PolicyScanner(blocked_patterns=[pattern, "zzz+", r"\d{9}"], cache_size=0)
+    start = time.perf_counter()
+    verdict = scanner.scan(text)
+    assert time.perf_counter() - start < 0.5
+    assert verdict.matched_patterns == (pattern,)
+
+
+def test_policy_patterns_reported_in_config_order():
+    """Scan and stream list matched patterns in the order they were configured."""
+    patterns = [r"\bfoo\b", r"acct-\d{6}", r"(x)\d"]
+    scanner = PolicyScanner(blocked_patterns=patterns)
+    text = "x1 acct-123456 then foo"
+    assert scanner.scan(text).matched_patterns == tuple(patterns)
+    stream = scanner.stream(overlap=16)
+    for chunk in (text[:12], text[12:]):
+        stream.feed(chunk)
+    assert stream.finish().matched_patterns == tuple(patterns)
+
+
+def test_policy_patterns_sharing_literal_prefix():
+    """Prefiltered patterns whose literals nest are all found."""
+    scanner = PolicyScanner(blocked_patterns=[r"secret\b", r"secretive\d", "ive1"])
+    verdict = scanner.scan("a secretive1 plan")
+    assert verdict.matched_patterns == (r"secretive\d", "ive1")
+
+
+def test_policy_prefilter_follows_ignorecase():
+    """Case-insensitive patterns match characters that casefold differently."""
+    scanner = PolicyScanner(blocked_patterns=[r"(?i)kiwi\d"])
+    assert scanner.scan("KİWİ7").allowed is False
+    assert scanner.scan("KıWı7").allowed is False
+    assert scanner.scan("kiwi").allowed is True
+
+
+def test_policy_invalid_pattern_rejected():
+    """An invalid pattern is reported by its source."""
+    with pytest.raises(ValueError, match="wor"):
+        PolicyScanner(blocked_patterns=["fine", "wor(se"])
+
+
+def test_policy_counts_tokens_like_tokenizer():
+    """Token count matches count_tokens."""
+    scanner = PolicyScanner(blocked_terms=["x"], blocked_patterns=["y"])
+    text = "the  quick\nbrown fox, jumps!"
+    assert scanner.scan(text).tokens == count_tokens(text)
+
+
+def test_policy_cache_returns_same_verdict():
+    """Repeated prompts are served from cache."""
+    metrics = Metrics()
+    scanner = PolicyScanner(blocked_terms=["bad"], cache_size=2, metrics=metrics)
+    first = scanner.scan("bad prompt")
+    assert scanner.scan("bad prompt") is first
+    assert metrics.get_counter(POLICY_DECISIONS, BLOCKED) == 2
+    assert metrics.get_counter(POLICY_CACHE_HITS) == 1
+
+
+def test_policy_verdict_is_immutable():
+    """Cached verdicts cannot be altered by a caller."""
+    scanner = PolicyScanner(blocked_terms=["bad"])
+    verdict = scanner.scan("bad prompt")
+    with pytest.raises(AttributeError):
+        verdict.allowed = True
+    assert scanner.scan("bad prompt").allowed is False
+
+
+def test_policy_cache_evicts_least_recently_used():
+    """Cache keeps at most cache_size verdicts."""
+    metrics = Metrics()
+    scanner = PolicyScanner(blocked_terms=["bad"], cache_size=2, metrics=metrics)
+    first = scanner.scan("one")
+    scanner.scan("two")
+    scanner.scan("one")
+    scanner.scan("three")
+    assert scanner.scan("one") is first
+    assert metrics.get_counter(POLICY_CACHE_HITS) == 2
+
+
+def test_policy_cache_long_prompts():
+    """Long prompts are cached by digest."""
+    scanner = PolicyScanner(blocked_terms=["bad"])
+    text = "word " * 1000
+    first = scanner.scan(text)
+    assert scanner.scan(text) is first
+
+
+def test_policy_stream_matches_across_chunks():
+    """Terms and patterns split across chunks are found."""
+    scanner = PolicyScanner(
+        blocked_terms=["ignore previous instructions"], blocked_patterns=[r"\d{3}-\d{4}"]
+    )
+    stream = scanner.stream()
+    assert stream.feed("please ign").allowed is True
+    stream.feed("ore previous instr")
+    stream.feed("uctions 555-")
+    assert stream.feed("1234 thanks").matched_terms == ("ignore previous instructions",)
+    verdict = stream.finish()
+    assert verdict.matched_patterns == (r"\d{3}-\d{4}",)
+    assert verdict.tokens == 6
+
+
+@pytest.mark.parametrize(
+    "pattern,chunks",
+    [
+        (r"\bfoo\b", ["foo", "bar and more"]),
+        (r"\bfoo\b", ["foo", " bar and more"]),
+        (r"\bcret", ["se", "cret and more"]),
+        ("secret$", ["secret", " is fine today"]),
+        ("secret$", ["top ", "secret"]),
+        ("^secret", ["my secret", " and more text"]),
+        (r"key(?!s)", ["key", "s and more text"]),
+    ],
+)
+def test_policy_stream_agrees_with_scan(pattern, chunks):
+    """Streaming gives the same verdict as scanning the joined prompt."""
+    scanner = PolicyScanner(blocked_patterns=[pattern, "unused"])
+    stream = scanner.stream(overlap=8)
+    for chunk in chunks:
+        stream.feed(chunk)
+    assert stream.finish() == scanner.scan("".join(chunks))
+
+
+def test_policy_stream_reports_pattern_once_overlap_arrives():
+    """A pattern match is reported before finish once it is certain."""
+    scanner = PolicyScanner(blocked_patterns=[r"\bfoo\b"])
+    stream = scanner.stream(overlap=4)
+    assert stream.feed("foo").allowed is True
+    assert stream.feed(" and more").allowed is False
+
+
+def test_policy_stream_counts_decision_on_finish():
+    """A finished stream counts as one decision."""
+    metrics = Metrics()
+    scanner = PolicyScanner(blocked_terms=["bad"], metrics=metrics)
+    stream = scanner.stream()
+    stream.feed("bad ")
+    stream.feed("prompt")
+    assert metrics.get_counter(POLICY_DECISIONS, BLOCKED) == 0
+    stream.finish()
+    stream.finish()
+    assert metrics.get_counter(POLICY_DECISIONS, BLOCKED) == 1
+
+
+def test_policy_stream_rejects_zero_overlap():
+    """Overlap must leave room for lookahead."""
+    with pytest.raises(ValueError):
+        PolicyScanner().stream(overlap=0)
+
+
+def test_policy_stream_holds_partial_word():
+    """A word cut at the end of the stream is scanned on finish."""
+    scanner = PolicyScanner(blocked_terms=["bad"])
+    stream = scanner.stream()
+    assert stream.feed("so b").allowed is True
+    assert stream.feed("ad").allowed is True
+    verdict = stream.finish()
+    assert verdict.allowed is False
+    assert verdict.tokens == 2
+
+
+def test_policy_check_raises():
+    """check raises PolicyViolation for blocked prompts."""
+    scanner = PolicyScanner(blocked_terms=["bad"])
+    assert scanner.check("good prompt") == 2
+    with pytest.raises(PolicyViolation):
+        scanner.check("bad prompt")
+
+
+def test_policy_from_config():
+    """Scanner is built from config rules."""
+    config = Config(blocked_terms=["bad"], blocked_patterns=["wor+se"])
+    scanner = PolicyScanner.from_config(config)
+    assert scanner.scan("this is bad").allowed is False
+    assert scanner.scan("this is worrrse").allowed is False
+
+
+def test_policy_publishes_metrics():
+    """Policy decisions are published to metrics."""
+    metrics = Metrics()
+    scanner = PolicyScanner(blocked_terms=["bad"], metrics=metrics)
+    scanner.scan("bad")
+    scanner.scan("good")
+    text = metrics.render_prometheus()
+    assert 'gate_policy_decisions_total{decision="deny",reason="content_policy"} 1' in text
+    assert 'gate_policy_decisions_total{decision="allow",reason="ok"} 1' in text